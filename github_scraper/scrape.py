@@ -1,526 +1,456 @@
-from playwright.sync_api import sync_playwright
+import asyncio
+import bisect
+import concurrent.futures
 import csv
-import time
+import io
+import itertools
+import json
+import os
 import re
+import sqlite3
+import time
+import tokenize
+import urllib.parse
+
+import httpx
 
 SEARCH_QUERY = "language:Python stars:>100 pushed:>2024-01-01"
 MAX_REPOS = 5
 MAX_FILES_PER_REPO = 5
+MAX_CONCURRENT_REQUESTS = 10
+MAX_FILE_BYTES = 512 * 1024  # skip blobs bigger than this (likely vendored/generated)
+
+API_BASE = "https://api.github.com"
+RAW_BASE = "https://raw.githubusercontent.com"
+CACHE_DB = "scrape_cache.db"
+
+SEARCH_URL = f"{API_BASE}/search/repositories?" + urllib.parse.urlencode(
+    {"q": SEARCH_QUERY, "sort": "stars", "per_page": MAX_REPOS}
+)
+
+# Kept deliberately small to stay permissive; matched exactly per path segment
+SKIP_DIRS = frozenset({'node_modules', '.git', '__pycache__'})
+
+# On-disk response cache shared by all requests (opened in main)
+_cache = None
+
+# Worker pool for the CPU-bound tokenize pass (created in main)
+_executor = None
+
+# Per-run memo of {(repo_name, branch): file_urls} so a repo that shows up
+# twice in search results is only walked once
+_tree_memo = {}
+
+# Per-run memo of {blob_sha: comments} - identical content (common for
+# __init__.py / setup.py scaffolds) is only ever extracted once
+_comments_memo = {}
+
+
+def open_cache():
+    """Open the on-disk response cache, creating the table on first run."""
+    cache = sqlite3.connect(CACHE_DB)
+    cache.execute(
+        "CREATE TABLE IF NOT EXISTS responses "
+        "(url TEXT PRIMARY KEY, etag TEXT, body BLOB, fetched_at INTEGER)"
+    )
+    return cache
+
+# Matches whole-line # comments and triple-quoted strings in one C-level scan
+_COMMENT_RE = re.compile(r'(?m)(?:^[ \t]*#.*$)|(?P<d>"""|\'\'\')(?:.|\n)*?(?P=d)')
+
+
+def _extract_comments_regex(code_text):
+    """Regex fallback for files tokenize rejects. Same per-line output shape."""
+    comments = []
+
+    # Cumulative newline index: line number of an offset is one bisect away
+    line_starts = [0] + [m.end() for m in re.finditer('\n', code_text)]
+
+    for m in _COMMENT_RE.finditer(code_text):
+        line_no = bisect.bisect_right(line_starts, m.start())
+        for offset, line in enumerate(m.group().splitlines()):
+            comments.append((line_no + offset, line.rstrip()))
+
+    return comments
+
 
 def extract_comments_from_code(code_text):
-    """Extract Python comments from code text (# comments and function/class docstrings)."""
+    """Extract Python comments from code text (# comments and docstrings) via tokenize."""
+    # Fast path: nothing comment-like anywhere, skip tokenizing entirely
+    if '#' not in code_text and '"""' not in code_text and "'''" not in code_text:
+        return []
+
     comments = []
-    lines = code_text.split('\n')
-    in_docstring = False
-    docstring_char = None
-    after_definition = False
-    
-    for i, line in enumerate(lines, 1):
-        stripped = line.strip()
-        
-        # Skip empty lines (but track if we just passed a definition)
-        if not stripped:
-            continue
-        
-        # Check if this line is a function or class definition
-        if stripped.startswith('def ') or stripped.startswith('class '):
-            after_definition = True
-            continue
-        
-        # Handle single-line comments (# comments)
-        if stripped.startswith('#'):
-            comments.append((i, line.rstrip()))
-            after_definition = False
-            continue
-        
-        # Check for triple quotes (docstrings)
-        if '"""' in line or "'''" in line:
-            if '"""' in line:
-                char = '"""'
-            else:
-                char = "'''"
-            
-            count = line.count(char)
-            
-            if not in_docstring:
-                # Only capture if it's right after a function/class definition
-                if after_definition and stripped.startswith(char):
-                    in_docstring = True
-                    docstring_char = char
-                    comments.append((i, line.rstrip()))
-                    
-                    # Check if it's a single-line docstring
-                    if count >= 2:
-                        in_docstring = False
-                        after_definition = False
-                else:
-                    after_definition = False
-            else:
-                # We're inside a docstring, capture the line
-                comments.append((i, line.rstrip()))
-                if char == docstring_char:
-                    in_docstring = False
-                    after_definition = False
-        elif in_docstring:
-            # Inside a multi-line docstring
-            comments.append((i, line.rstrip()))
-        else:
-            # Any other code line means we're past the potential docstring position
-            after_definition = False
-    
+    readline = io.BytesIO(code_text.encode('utf-8')).readline
+
+    # A STRING is a docstring only when it starts a logical line, i.e. the
+    # previous significant token is one of these (NL/COMMENT don't count)
+    docstring_positions = (
+        tokenize.ENCODING, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT
+    )
+    prev_type = None
+
+    try:
+        for tok in tokenize.tokenize(readline):
+            if tok.type == tokenize.COMMENT:
+                comments.append((tok.start[0], tok.line.rstrip()))
+                continue
+            if (tok.type == tokenize.STRING and tok.string[:3] in ('"""', "'''")
+                    and prev_type in docstring_positions):
+                # Docstring; emit one row per physical line
+                for offset, line in enumerate(tok.line.rstrip().splitlines()):
+                    comments.append((tok.start[0] + offset, line.rstrip()))
+            if tok.type != tokenize.NL:
+                prev_type = tok.type
+    except (tokenize.TokenError, SyntaxError, ValueError):
+        # Malformed or truncated source - rescan the whole text with the regex
+        return _extract_comments_regex(code_text)
+
     return comments
 
-def find_python_files_in_repo(page, repo_url, repo_name):
+
+def build_client():
+    """Build an httpx client with GitHub API headers (auth from GITHUB_TOKEN if set)."""
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "Accept-Encoding": "gzip, deflate",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+    token = os.environ.get("GITHUB_TOKEN")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    else:
+        print("⚠️  GITHUB_TOKEN not set - using unauthenticated rate limits (60 req/h)")
+    # Bound the pool so long crawls can't accumulate idle sockets
+    limits = httpx.Limits(
+        max_connections=MAX_CONCURRENT_REQUESTS,
+        max_keepalive_connections=MAX_CONCURRENT_REQUESTS,
+        keepalive_expiry=30.0,
+    )
+    return httpx.AsyncClient(
+        http2=True, headers=headers, timeout=30.0, follow_redirects=True, limits=limits
+    )
+
+
+async def api_get(client, sem, url, cache_key=None, immutable=False, **kwargs):
+    """GET a URL and return its body text, using the on-disk cache when possible.
+
+    Cached responses are revalidated with If-None-Match; a 304 counts as a
+    cache hit. Entries marked immutable (e.g. blobs keyed by git sha) are
+    served straight from the cache with no request at all. Sleeps and
+    retries when the GitHub rate limit is exhausted.
+    """
+    key = cache_key or url
+    cached = None
+    if _cache is not None:
+        cached = _cache.execute(
+            "SELECT etag, body FROM responses WHERE url = ?", (key,)
+        ).fetchone()
+        if cached and immutable:
+            return cached[1].decode('utf-8')
+        if cached and cached[0]:
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers["If-None-Match"] = cached[0]
+            kwargs["headers"] = headers
+
+    while True:
+        async with sem:
+            response = await client.get(url, **kwargs)
+
+        # A 403 with no remaining quota means we hit the rate limit; wait
+        # until the advertised reset time instead of a fixed delay
+        if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
+            reset_at = int(response.headers.get("X-RateLimit-Reset", 0))
+            wait = max(reset_at - time.time(), 1)
+            print(f"  ⏳ Rate limit exhausted, sleeping {wait:.0f}s until reset...")
+            await asyncio.sleep(wait)
+            continue
+
+        if response.status_code == 304 and cached:
+            return cached[1].decode('utf-8')
+
+        response.raise_for_status()
+        body = response.text
+
+        if _cache is not None:
+            _cache.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, body, fetched_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response.headers.get("ETag"), body.encode('utf-8'), int(time.time())),
+            )
+            _cache.commit()
+
+        return body
+
+
+async def find_python_files_in_repo(client, sem, repo_name, default_branch):
     """
-    Find Python files in a repository by exploring directories.
-    Returns a dict of {file_url: file_path}
+    Find Python files in a repository using the git trees API.
+    One recursive tree call returns every path in the repo.
+    Returns a dict of {raw_file_url: (file_path, blob_sha)}
     """
+    memo_key = (repo_name, default_branch)
+    if memo_key in _tree_memo:
+        return _tree_memo[memo_key]
+
     file_urls = {}
-    visited_urls = set()
-    
+    seen_shas = set()
+
     print(f"\n  {'='*60}")
-    print(f"  DETAILED FILE SEARCH FOR: {repo_name}")
+    print(f"  FILE SEARCH FOR: {repo_name}")
     print(f"  {'='*60}")
-    
-    def explore_directory(dir_url, depth=0):
+
+    tree_url = f"{API_BASE}/repos/{repo_name}/git/trees/{default_branch}?recursive=1"
+
+    try:
+        tree = json.loads(await api_get(client, sem, tree_url))
+    except (httpx.HTTPError, json.JSONDecodeError) as e:
+        print(f"  ❌ Error fetching tree: {e}")
+        return file_urls
+
+    if tree.get("truncated"):
+        print(f"  ⚠️  Tree listing truncated by GitHub (very large repo)")
+
+    # Scan shallow paths first (breadth-first order) so the file budget goes
+    # to top-level modules before deeply nested ones
+    entries = sorted(tree.get("tree", []), key=lambda e: e.get("path", "").count('/'))
+
+    for entry in entries:
         if len(file_urls) >= MAX_FILES_PER_REPO:
-            print(f"  {'  '*depth}✓ Reached MAX_FILES_PER_REPO ({MAX_FILES_PER_REPO}), stopping search")
-            return
-            
-        if depth > 5:  # INCREASED from 3 to 5
-            print(f"  {'  '*depth}⚠️  Max depth reached, stopping")
-            return
-        
-        if dir_url in visited_urls:
-            print(f"  {'  '*depth}⤷ Already visited, skipping")
-            return
-        visited_urls.add(dir_url)
-        
-        try:
-            path_display = dir_url.split('/tree/')[-1] if '/tree/' in dir_url else 'root'
-            print(f"  {'  '*depth}📁 Exploring: {path_display}")
-            
-            # ENHANCED: Increased timeout and added network idle wait
-            page.goto(dir_url, timeout=90000, wait_until="networkidle")
-            
-            # ENHANCED: Wait longer for JavaScript to render content
-            time.sleep(4)  # Increased from 2 to 4 seconds
-            
-            # Additional wait for GitHub's lazy-loaded content
-            try:
-                page.wait_for_selector("div[role='grid'], div[role='rowgroup']", timeout=5000)
-            except:
-                pass  # Continue even if selector not found
-            
-            time.sleep(2)  # Additional buffer
-            
-            # Find all file and directory entries
-            entries = page.locator("a[href]").all()
-            print(f"  {'  '*depth}   Found {len(entries)} total links on page")
-            
-            # DEBUG: Sample some hrefs to understand the structure
-            if depth <= 1:
-                print(f"  {'  '*depth}   🔍 DEBUG: Sampling first 20 hrefs...")
-                for i, entry in enumerate(entries[:20]):
-                    try:
-                        href = entry.get_attribute("href")
-                        if href and ('tree' in href or 'blob' in href or '.py' in href):
-                            print(f"  {'  '*depth}      [{i}] {href[:100]}")
-                    except:
-                        continue
-            
-            directories = []
-            files_found_here = 0
-            dirs_found_here = 0
-            
-            for entry in entries:
-                try:
-                    href = entry.get_attribute("href")
-                    if not href:
-                        continue
-                    
-                    # ENHANCED: More flexible URL detection
-                    is_github_url = ('github.com' in href or href.startswith('/'))
-                    if not is_github_url:
-                        continue
-                    
-                    # Python file found - ENHANCED detection
-                    if ('/blob/' in href and '.py' in href) or href.endswith('.py'):
-                        file_name = href.split('/')[-1]
-                        if file_name.endswith('.py'):
-                            file_url = f"https://github.com{href}" if href.startswith('/') else href
-                            
-                            # Extract the full file path from the URL
-                            if '/blob/' in file_url:
-                                parts = file_url.split('/blob/')
-                                if len(parts) > 1:
-                                    path_parts = parts[1].split('/', 1)
-                                    if len(path_parts) > 1:
-                                        file_path = path_parts[1]
-                                    else:
-                                        file_path = file_name
-                                else:
-                                    file_path = file_name
-                            else:
-                                file_path = file_name
-                            
-                            if file_url not in file_urls:
-                                file_urls[file_url] = file_path
-                                files_found_here += 1
-                                print(f"  {'  '*depth}   ✓ Found Python file #{len(file_urls)}: {file_path}")
-                                
-                                if len(file_urls) >= MAX_FILES_PER_REPO:
-                                    print(f"  {'  '*depth}   🎯 Reached target of {MAX_FILES_PER_REPO} files!")
-                                    return
-                    
-                    # ENHANCED: Broader directory detection
-                    elif '/tree/' in href and depth < 5:
-                        # Extract directory path
-                        path_parts = href.split('/tree/')
-                        if len(path_parts) > 1:
-                            dir_path = path_parts[-1]
-                            dir_name = dir_path.split('/')[-1].lower()
-                            
-                            # REDUCED skip list - be more permissive
-                            skip_dirs = ['node_modules', '.git', '__pycache__']
-                            
-                            # Don't skip based on dir name alone
-                            should_skip = False
-                            for skip in skip_dirs:
-                                if skip in dir_name:
-                                    should_skip = True
-                                    break
-                            
-                            if not should_skip:
-                                full_dir_url = f"https://github.com{href}" if href.startswith('/') else href
-                                
-                                # Clean URL
-                                if '?' in full_dir_url:
-                                    full_dir_url = full_dir_url.split('?')[0]
-                                if '#' in full_dir_url:
-                                    full_dir_url = full_dir_url.split('#')[0]
-                                
-                                if full_dir_url not in directories and full_dir_url not in visited_urls:
-                                    directories.append(full_dir_url)
-                                    dirs_found_here += 1
-                    
-                    # ENHANCED: Also check for relative directory links
-                    elif href.startswith('/') and '/tree/' not in href and '/blob/' not in href:
-                        # This might be a directory link in a different format
-                        # Check if it looks like a subdirectory of current repo
-                        if repo_name.replace('/', '') in href.replace('/', ''):
-                            # Try to construct a tree URL
-                            if depth < 5:
-                                potential_dir = f"https://github.com{href}"
-                                if potential_dir not in directories and potential_dir not in visited_urls:
-                                    # Don't add it yet, just note it for potential exploration
-                                    pass
-                
-                except Exception as e:
-                    continue
-            
-            print(f"  {'  '*depth}   Summary: {files_found_here} .py files, {dirs_found_here} subdirs detected")
-            
-            # Explore subdirectories
-            if directories and len(file_urls) < MAX_FILES_PER_REPO:
-                print(f"  {'  '*depth}   Will explore {min(len(directories), 15)} subdirectories...")  # Increased from 10 to 15
-                for dir_url_sub in directories[:15]:
-                    if len(file_urls) >= MAX_FILES_PER_REPO:
-                        break
-                    explore_directory(dir_url_sub, depth + 1)
-        
-        except Exception as e:
-            print(f"  {'  '*depth}   ❌ Error: {e}")
-    
-    # Start exploration from the repository root
-    explore_directory(repo_url)
-    
+            print(f"  🎯 Reached target of {MAX_FILES_PER_REPO} files!")
+            break
+
+        if entry.get("type") != "blob":
+            continue
+
+        path = entry.get("path", "")
+        if not path.endswith('.py'):
+            continue
+
+        if not SKIP_DIRS.isdisjoint(path.split('/')[:-1]):
+            continue
+
+        # Identical blobs share a git sha - don't spend the file budget on copies
+        sha = entry.get("sha")
+        if sha in seen_shas:
+            print(f"  ⤷ Skipping {path} (duplicate blob {sha[:7]})")
+            continue
+        seen_shas.add(sha)
+
+        # The tree entry already tells us the blob size - don't fetch huge files
+        if entry.get("size", 0) > MAX_FILE_BYTES:
+            print(f"  ⤷ Skipping {path} ({entry['size']} bytes > {MAX_FILE_BYTES})")
+            continue
+
+        raw_url = f"{RAW_BASE}/{repo_name}/{default_branch}/{path}"
+        file_urls[raw_url] = (path, sha)
+        print(f"  ✓ Found Python file #{len(file_urls)}: {path}")
+
     print(f"  {'='*60}")
     print(f"  SEARCH COMPLETE: Found {len(file_urls)} Python files")
     if len(file_urls) < MAX_FILES_PER_REPO:
         print(f"  ⚠️  WARNING: Only found {len(file_urls)}/{MAX_FILES_PER_REPO} files!")
     print(f"  {'='*60}\n")
-    
+
+    _tree_memo[memo_key] = file_urls
     return file_urls
 
 
-def main():
+async def fetch_file_comments(client, sem, repo_name, raw_url, file_path, blob_sha):
+    """Fetch one raw file and extract its comments. Returns (file_path, rows) or (file_path, None) on error."""
+    try:
+        # Blob content never changes for a given sha, so cache it forever
+        code_text = await api_get(
+            client, sem, raw_url, cache_key=f"blob:{blob_sha}", immutable=True
+        )
+    except httpx.HTTPError as e:
+        print(f"      ❌ Error fetching {file_path}: {e}")
+        return file_path, None
+
+    if not code_text or len(code_text) <= 10:
+        print(f"      ❌ No code content retrieved for {file_path}")
+        return file_path, None
+
+    # The blob sha is already a content digest, so identical files across
+    # repos share one extraction result
+    comments = _comments_memo.get(blob_sha)
+    if comments is None:
+        # Tokenizing big files is CPU work - run it off the event loop
+        loop = asyncio.get_running_loop()
+        comments = await loop.run_in_executor(_executor, extract_comments_from_code, code_text)
+        _comments_memo[blob_sha] = comments
+
+    rows = [(repo_name, file_path, line_no, comment) for line_no, comment in comments]
+    return file_path, rows
+
+
+async def process_repo(client, sem, repo_name, default_branch):
+    """Process one repository end-to-end. Returns (repo_name, comment_rows, summary_dict)."""
+    print(f"\n{'#'*70}")
+    print(f"PROCESSING REPO: {repo_name}")
+    print(f"{'#'*70}")
+
+    summary = {
+        'files_found': 0,
+        'files_processed': 0,
+        'files_with_comments': 0,
+        'files_without_comments': 0,
+        'total_comments': 0
+    }
+    comment_rows = []
+
+    print(f"Searching for Python files in {repo_name}...")
+    file_urls = await find_python_files_in_repo(client, sem, repo_name, default_branch)
+
+    summary['files_found'] = len(file_urls)
+
+    if not file_urls:
+        print(f"❌ No Python files found in {repo_name}\n")
+        return repo_name, comment_rows, summary
+
+    print(f"✓ Found {len(file_urls)} Python files")
+    print(f"Will process up to {min(len(file_urls), MAX_FILES_PER_REPO)} files\n")
+
+    # Fetch and process all files concurrently
+    results = await asyncio.gather(*[
+        fetch_file_comments(client, sem, repo_name, raw_url, file_path, blob_sha)
+        for raw_url, (file_path, blob_sha) in itertools.islice(file_urls.items(), MAX_FILES_PER_REPO)
+    ])
+
+    for file_path, rows in results:
+        if rows is None:
+            continue
+
+        summary['files_processed'] += 1
+
+        if rows:
+            comment_rows.extend(rows)
+            summary['files_with_comments'] += 1
+            summary['total_comments'] += len(rows)
+            print(f"      ✓ Extracted {len(rows)} comments from {file_path}")
+        else:
+            summary['files_without_comments'] += 1
+            print(f"      ⚠️  NO COMMENTS found in {file_path}")
+
+    print(f"\n  Summary for {repo_name}:")
+    print(f"    Files found: {summary['files_found']}")
+    print(f"    Files processed: {summary['files_processed']}")
+    print(f"    Files with comments: {summary['files_with_comments']}")
+    print(f"    Files without comments: {summary['files_without_comments']}")
+    print(f"    Total comments: {summary['total_comments']}")
+
+    return repo_name, comment_rows, summary
+
+
+async def main():
+    global _cache, _executor
+
     repos = []
-    all_comments = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(viewport={"width": 1400, "height": 900})
-        page = context.new_page()
-
-        # -------------------------------------------------
-        # 1. Search GitHub - Direct URL approach
-        # -------------------------------------------------
-        print("Searching GitHub repositories...")
-        import urllib.parse
-        encoded_query = urllib.parse.quote(SEARCH_QUERY)
-        search_url = f"https://github.com/search?q={encoded_query}&type=repositories"
-        
-        print(f"Going to: {search_url}")
-        page.goto(search_url)
-        
-        print("Waiting for search results...")
-        time.sleep(5)
-        
-        # Wait for results with multiple attempts
-        results_loaded = False
-        try:
-            page.wait_for_selector("div[data-testid='results-list']", timeout=10000)
-            results_loaded = True
-            print("Results loaded (modern UI)")
-        except:
-            try:
-                page.wait_for_selector("ul.repo-list", timeout=5000)
-                results_loaded = True
-                print("Results loaded (classic UI)")
-            except:
-                print("Warning: Could not detect results container, trying anyway...")
-        
-        time.sleep(2)
-
-        # Extract repository information
-        print("Extracting repository information...")
-        repo_links = []
-        
-        # Strategy 1: Modern UI with data-testid
-        try:
-            result_items = page.locator("div[data-testid='results-list'] > div").all()
-            print(f"Found {len(result_items)} result items")
-            
-            for item in result_items:
-                try:
-                    repo_link = item.locator("a[href*='/'][href*='/']").first
-                    href = repo_link.get_attribute("href")
-                    text = repo_link.inner_text().strip()
-                    
-                    if href and '/' in text and text.count('/') == 1:
-                        full_url = f"https://github.com{href}" if href.startswith('/') else href
-                        if '/tree/' in full_url or '/blob/' in full_url:
-                            full_url = '/'.join(full_url.split('/')[:5])
-                        
-                        repo_links.append((text, full_url))
-                        print(f"  Found: {text}")
-                        
-                        if len(repo_links) >= MAX_REPOS:
-                            break
-                except Exception as e:
-                    continue
-        except Exception as e:
-            print(f"Strategy 1 failed: {e}")
-        
-        # Strategy 2: Look for specific repo link patterns
-        if len(repo_links) < MAX_REPOS:
-            try:
-                all_links = page.locator("a[href]").all()
-                for link in all_links:
-                    try:
-                        href = link.get_attribute("href")
-                        if href and href.startswith('/') and href.count('/') == 2:
-                            parts = href.strip('/').split('/')
-                            if len(parts) == 2 and not any(x in href for x in ['search', 'topics', 'marketplace', 'pricing']):
-                                repo_name = f"{parts[0]}/{parts[1]}"
-                                full_url = f"https://github.com{href}"
-                                
-                                if not any(r[0] == repo_name for r in repo_links):
-                                    repo_links.append((repo_name, full_url))
-                                    print(f"  Found: {repo_name}")
-                                    
-                                    if len(repo_links) >= MAX_REPOS:
-                                        break
-                    except:
-                        continue
-            except Exception as e:
-                print(f"Strategy 2 failed: {e}")
-
-        print(f"\nTotal repositories found: {len(repo_links)}")
-
-        if not repo_links:
-            print("ERROR: No repositories found! Check if GitHub search is working.")
-            browser.close()
-            return
-
-        # Extract stars and last updated date for each repo
-        for repo_name, repo_url in repo_links[:MAX_REPOS]:
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    print(f"\nVisiting: {repo_name}" + (f" (Attempt {attempt + 1}/{max_retries})" if attempt > 0 else ""))
-                    page.goto(repo_url, timeout=90000, wait_until="domcontentloaded")
-                    time.sleep(3)
-                    
-                    stars = "N/A"
-                    updated = "N/A"
-                    
-                    try:
-                        star_elem = page.locator("#repo-stars-counter-star").first
-                        if star_elem.count() > 0:
-                            stars = star_elem.get_attribute("title") or star_elem.inner_text().strip()
-                    except:
-                        try:
-                            star_elem = page.locator("a[href$='/stargazers']").first
-                            stars = star_elem.inner_text().strip()
-                        except:
-                            pass
-                    
-                    try:
-                        time_elem = page.locator("relative-time").first
-                        if time_elem.count() > 0:
-                            updated = time_elem.get_attribute("datetime")
-                            if not updated:
-                                updated = time_elem.inner_text().strip()
-                        
-                        if updated == "N/A" or not updated:
-                            commit_time = page.locator("relative-time[datetime]").first
-                            if commit_time.count() > 0:
-                                updated = commit_time.get_attribute("datetime") or commit_time.inner_text().strip()
-                    except Exception as e:
-                        print(f"  Could not find updated date: {e}")
-                    
-                    repos.append((repo_name, stars, updated, repo_url))
-                    print(f"  Stars: {stars}")
-                    print(f"  Updated: {updated}")
-                    break
-                    
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        print(f"  Error getting repo details after {max_retries} attempts: {e}")
-                        repos.append((repo_name, "N/A", "N/A", repo_url))
-                    else:
-                        print(f"  Timeout, retrying...")
-                        time.sleep(3)
-
-        # Save repos.csv
-        with open("repos.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["repo", "stars", "updated", "url"])
-            writer.writerows(repos)
-
-        print(f"\n{'='*50}")
-        print(f"Saved repos.csv with {len(repos)} repositories")
-        print(f"{'='*50}\n")
-
-        # -------------------------------------------------
-        # 2. Visit each repo & extract comments
-        # -------------------------------------------------
-        file_processing_summary = {}
-        
-        for repo_name, _, _, repo_url in repos:
-            print(f"\n{'#'*70}")
-            print(f"PROCESSING REPO: {repo_name}")
-            print(f"{'#'*70}")
-            
-            file_processing_summary[repo_name] = {
-                'files_found': 0,
-                'files_processed': 0,
-                'files_with_comments': 0,
-                'files_without_comments': 0,
-                'total_comments': 0
-            }
-            
-            try:
-                # Find Python files
-                print(f"Searching for Python files in {repo_name}...")
-                file_urls = find_python_files_in_repo(page, repo_url, repo_name)
-                
-                file_processing_summary[repo_name]['files_found'] = len(file_urls)
-
-                if not file_urls:
-                    print(f"❌ No Python files found in {repo_name}\n")
-                    continue
-
-                print(f"✓ Found {len(file_urls)} Python files")
-                print(f"Will process up to {min(len(file_urls), MAX_FILES_PER_REPO)} files\n")
-
-                # Process each Python file
-                file_num = 0
-                for file_url, file_path in list(file_urls.items())[:MAX_FILES_PER_REPO]:
-                    file_num += 1
-                    try:
-                        print(f"  [{file_num}/{min(len(file_urls), MAX_FILES_PER_REPO)}] Processing: {file_path}")
-                        
-                        # Get raw URL
-                        raw_url = file_url.replace('/blob/', '/raw/')
-                        
-                        page.goto(raw_url, timeout=90000)
-                        time.sleep(1)
-                        
-                        # Get code content
-                        code_text = page.locator("body").inner_text()
-                        
-                        if code_text and len(code_text) > 10:
-                            # Extract comments
-                            comments = extract_comments_from_code(code_text)
-                            
-                            file_processing_summary[repo_name]['files_processed'] += 1
-                            
-                            if len(comments) > 0:
-                                for line_no, comment in comments:
-                                    all_comments.append((repo_name, file_path, line_no, comment))
-                                
-                                file_processing_summary[repo_name]['files_with_comments'] += 1
-                                file_processing_summary[repo_name]['total_comments'] += len(comments)
-                                print(f"      ✓ Extracted {len(comments)} comments")
-                            else:
-                                file_processing_summary[repo_name]['files_without_comments'] += 1
-                                print(f"      ⚠️  NO COMMENTS found in this file")
-                        else:
-                            print(f"      ❌ No code content retrieved")
-                        
-                    except Exception as e:
-                        print(f"      ❌ Error: {e}")
-                        continue
-
-                print(f"\n  Summary for {repo_name}:")
-                print(f"    Files found: {file_processing_summary[repo_name]['files_found']}")
-                print(f"    Files processed: {file_processing_summary[repo_name]['files_processed']}")
-                print(f"    Files with comments: {file_processing_summary[repo_name]['files_with_comments']}")
-                print(f"    Files without comments: {file_processing_summary[repo_name]['files_without_comments']}")
-                print(f"    Total comments: {file_processing_summary[repo_name]['total_comments']}")
-
-            except Exception as e:
-                print(f"❌ Error processing repo: {e}\n")
-                continue
 
-        # -------------------------------------------------
-        # 3. Save comments.csv
-        # -------------------------------------------------
-        with open("comments.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["repo", "file", "line", "comment"])
-            writer.writerows(all_comments)
-
-        print(f"\n{'='*70}")
-        print(f"FINAL SUMMARY")
-        print(f"{'='*70}")
-        print(f"Total repositories: {len(repos)}")
-        print(f"Total comments collected: {len(all_comments)}")
-        print(f"\nPer-Repo Breakdown:")
-        for repo_name, summary in file_processing_summary.items():
-            print(f"\n  {repo_name}:")
-            print(f"    Files found: {summary['files_found']}")
-            print(f"    Files processed: {summary['files_processed']}")
-            print(f"    Files with comments: {summary['files_with_comments']}")
-            print(f"    Files without comments: {summary['files_without_comments']}")
-            print(f"    Total comments: {summary['total_comments']}")
-            
-            if summary['files_found'] < MAX_FILES_PER_REPO:
-                print(f"    ⚠️  WARNING: Only found {summary['files_found']}/{MAX_FILES_PER_REPO} files!")
-            if summary['files_without_comments'] > 0:
-                print(f"    ℹ️  Note: {summary['files_without_comments']} files had no comments")
-        
-        print(f"\n{'='*70}")
-        print(f"Files saved:")
-        print(f"  ✓ repos.csv ({len(repos)} repositories)")
-        print(f"  ✓ comments.csv ({len(all_comments)} comments)")
-        print(f"{'='*70}\n")
-        
-        browser.close()
+    client = build_client()
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    _cache = open_cache()
+    _executor = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+
+    # -------------------------------------------------
+    # 1. Search GitHub repositories via the REST API
+    # -------------------------------------------------
+    print("Searching GitHub repositories...")
+
+    try:
+        items = json.loads(await api_get(client, sem, SEARCH_URL)).get("items", [])
+    except (httpx.HTTPError, json.JSONDecodeError) as e:
+        print(f"ERROR: Repository search failed: {e}")
+        await client.aclose()
+        return
+
+    print(f"\nTotal repositories found: {len(items)}")
+
+    if not items:
+        print("ERROR: No repositories found! Check if GitHub search is working.")
+        await client.aclose()
+        return
+
+    # Extract name, stars, last pushed date and default branch for each repo
+    repo_branches = {}
+    seen_repos = set()
+    for item in items[:MAX_REPOS]:
+        repo_name = item["full_name"]
+        if repo_name in seen_repos:
+            continue
+        seen_repos.add(repo_name)
+        stars = item.get("stargazers_count", "N/A")
+        updated = item.get("pushed_at", "N/A")
+        repo_url = item.get("html_url", f"https://github.com/{repo_name}")
+        repo_branches[repo_name] = item.get("default_branch", "HEAD")
+
+        repos.append((repo_name, stars, updated, repo_url))
+        print(f"  Found: {repo_name}")
+        print(f"    Stars: {stars}")
+        print(f"    Updated: {updated}")
+
+    # Save repos.csv
+    with open("repos.csv", "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(["repo", "stars", "updated", "url"])
+        writer.writerows(repos)
+
+    print(f"\n{'='*50}")
+    print(f"Saved repos.csv with {len(repos)} repositories")
+    print(f"{'='*50}\n")
+
+    # -------------------------------------------------
+    # 2. Process repos concurrently, streaming comments to disk
+    # -------------------------------------------------
+    file_processing_summary = {}
+    total_comments = 0
+
+    with open("comments.csv", "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(["repo", "file", "line", "comment"])
+
+        tasks = [
+            asyncio.ensure_future(process_repo(client, sem, repo_name, repo_branches[repo_name]))
+            for repo_name, _, _, _ in repos
+        ]
+
+        # Write each repo's rows as soon as its task finishes
+        for task in asyncio.as_completed(tasks):
+            repo_name, comment_rows, summary = await task
+            file_processing_summary[repo_name] = summary
+            writer.writerows(comment_rows)
+            total_comments += len(comment_rows)
+            f.flush()  # keep completed repos on disk even if a later one crashes
+
+    print(f"\n{'='*70}")
+    print(f"FINAL SUMMARY")
+    print(f"{'='*70}")
+    print(f"Total repositories: {len(repos)}")
+    print(f"Total comments collected: {total_comments}")
+    print(f"\nPer-Repo Breakdown:")
+    for repo_name, summary in file_processing_summary.items():
+        print(f"\n  {repo_name}:")
+        print(f"    Files found: {summary['files_found']}")
+        print(f"    Files processed: {summary['files_processed']}")
+        print(f"    Files with comments: {summary['files_with_comments']}")
+        print(f"    Files without comments: {summary['files_without_comments']}")
+        print(f"    Total comments: {summary['total_comments']}")
+
+        if summary['files_found'] < MAX_FILES_PER_REPO:
+            print(f"    ⚠️  WARNING: Only found {summary['files_found']}/{MAX_FILES_PER_REPO} files!")
+        if summary['files_without_comments'] > 0:
+            print(f"    ℹ️  Note: {summary['files_without_comments']} files had no comments")
+
+    print(f"\n{'='*70}")
+    print(f"Files saved:")
+    print(f"  ✓ repos.csv ({len(repos)} repositories)")
+    print(f"  ✓ comments.csv ({total_comments} comments)")
+    print(f"{'='*70}\n")
+
+    _executor.shutdown()
+    _cache.close()
+    await client.aclose()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())